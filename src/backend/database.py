@@ -4,6 +4,7 @@ MongoDB database configuration and setup for Mergington High School API
 
 from pymongo import MongoClient
 from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 
 # Connect to MongoDB
 client = MongoClient('mongodb://localhost:27017/')
@@ -11,24 +12,36 @@ db = client['mergington_high']
 activities_collection = db['activities']
 teachers_collection = db['teachers']
 
+# Shared Argon2 hasher, reused instead of being rebuilt on every call
+password_hasher = PasswordHasher()
+
 # Methods
 def hash_password(password):
     """Hash password using Argon2"""
-    ph = PasswordHasher()
-    return ph.hash(password)
+    return password_hasher.hash(password)
+
+def verify_password(hashed_password, password):
+    """Check a password against its Argon2 hash"""
+    try:
+        return password_hasher.verify(hashed_password, password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 def init_database():
     """Initialize database if empty"""
 
     # Initialize activities if empty
     if activities_collection.count_documents({}) == 0:
-        for name, details in initial_activities.items():
-            activities_collection.insert_one({"_id": name, **details})
+        activities_collection.insert_many(
+            [{"_id": name, **details} for name, details in initial_activities.items()]
+        )
             
     # Initialize teacher accounts if empty
     if teachers_collection.count_documents({}) == 0:
-        for teacher in initial_teachers:
-            teachers_collection.insert_one({"_id": teacher["username"], **teacher})
+        teachers_collection.insert_many([
+            {"_id": teacher["username"], **teacher, "password": hash_password(teacher["password"])}
+            for teacher in initial_teachers
+        ])
 
 # Initial database if empty
 initial_activities = {
@@ -166,23 +179,24 @@ initial_activities = {
     }
 }
 
+# Seed passwords are hashed only when the teachers collection is seeded
 initial_teachers = [
     {
         "username": "mrodriguez",
         "display_name": "Ms. Rodriguez",
-        "password": hash_password("art123"),
+        "password": "art123",
         "role": "teacher"
      },
     {
         "username": "mchen",
         "display_name": "Mr. Chen",
-        "password": hash_password("chess456"),
+        "password": "chess456",
         "role": "teacher"
     },
     {
         "username": "principal",
         "display_name": "Principal Martinez",
-        "password": hash_password("admin789"),
+        "password": "admin789",
         "role": "admin"
     }
 ]
@@ -2,9 +2,17 @@
 Endpoints for the High School Management System API
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import RedirectResponse
-from typing import Dict, Any, Optional, List
+from fastapi import APIRouter, HTTPException, Query, Header
+from fastapi.responses import RedirectResponse, Response
+from typing import Dict, Any, Optional, List, Tuple, Callable
+from functools import lru_cache
+from dataclasses import dataclass
+from operator import itemgetter
+from bisect import bisect_left
+from itertools import islice
+from threading import Lock
+import orjson
+import xxhash
 
 from ..database import activities_collection, teachers_collection
 
@@ -13,12 +21,135 @@ router = APIRouter(
     tags=["activities"]
 )
 
-@router.get("/", response_model=Dict[str, Any])
+@dataclass(frozen=True, eq=False)
+class _Indexes:
+    """Read-only snapshot of the activities collection and its lookup tables
+
+    Snapshots are built in full and then published by rebinding a single
+    module-level name, so concurrent requests see either the old snapshot or
+    the new one, never a half-built one.
+    """
+    # (name, activity) pairs in collection order
+    all_activities: List[Tuple[str, Dict[str, Any]]]
+    # (name, activity) pairs per scheduled day, in collection order
+    by_day: Dict[str, List[Tuple[str, Dict[str, Any]]]]
+    # Per-day (start_time, position, name, activity) entries sorted by start
+    # time, so a day + start_time filter can bisect to the first match. The
+    # position restores the collection order of the results.
+    day_time: Dict[str, List[Tuple[str, int, str, Dict[str, Any]]]]
+    # Serialized, alphabetically sorted list of days that have activities
+    days_body: bytes
+
+_indexes: Optional[_Indexes] = None
+
+# Replaced on every invalidation; a snapshot is only published if the token it
+# started with is still current, so a build racing a write is never kept.
+# The lock only guards publishing and invalidation; readers never take it.
+_indexes_token = object()
+_indexes_lock = Lock()
+
+def _build_indexes() -> _Indexes:
+    """Load every activity once into a fresh snapshot and publish it"""
+    global _indexes
+    token = _indexes_token
+    all_activities = []
+    by_day = {}
+    day_time = {}
+    for position, activity in enumerate(activities_collection.find({})):
+        name = activity.pop('_id')
+        all_activities.append((name, activity))
+        entry = (activity["schedule_details"]["start_time"], position, name, activity)
+        for day in activity["schedule_details"]["days"]:
+            by_day.setdefault(day, []).append((name, activity))
+            day_time.setdefault(day, []).append(entry)
+    for entries in day_time.values():
+        entries.sort(key=itemgetter(0, 1))
+
+    indexes = _Indexes(all_activities, by_day, day_time, orjson.dumps(sorted(by_day)))
+    with _indexes_lock:
+        if token is _indexes_token:
+            _indexes = indexes
+    return indexes
+
+def _current_indexes() -> _Indexes:
+    """Return the published snapshot, building one if there is none"""
+    indexes = _indexes
+    return indexes if indexes is not None else _build_indexes()
+
+@lru_cache(maxsize=64)
+def _compile_filter(
+    start_time: Optional[str],
+    end_time: Optional[str]
+) -> Callable[[Dict[str, Any]], bool]:
+    """Build a schedule_details predicate for the time filters once per combination"""
+    # One specialized closure per filter shape, so matching a document is a
+    # single call with direct key lookups
+    if start_time and end_time:
+        return lambda details: details["start_time"] >= start_time and details["end_time"] <= end_time
+    if start_time:
+        return lambda details: details["start_time"] >= start_time
+    if end_time:
+        return lambda details: details["end_time"] <= end_time
+    return lambda details: True
+
+@lru_cache(maxsize=256)
+def _compute_response_bytes(
+    indexes: _Indexes,
+    day: Optional[str],
+    start_time: Optional[str],
+    end_time: Optional[str]
+) -> Tuple[bytes, str]:
+    """Serialize the activity listing for one filter combination, with its ETag
+
+    Results live in a bounded LRU cache that is cleared whenever a signup or
+    unregister changes the underlying data. The snapshot is part of the key,
+    so a listing computed from replaced data can never be served afterwards.
+    """
+    if not (day or start_time or end_time):
+        # Unfiltered listings need no predicate at all
+        activities = dict(indexes.all_activities)
+    elif day and start_time:
+        # Skip straight to the day's activities starting at or after start_time,
+        # keeping only the matches before restoring collection order
+        entries = indexes.day_time.get(day, [])
+        first = bisect_left(entries, start_time, key=itemgetter(0))
+        matches = _compile_filter(None, end_time)
+        hits = [
+            entry for entry in islice(entries, first, None)
+            if matches(entry[3]["schedule_details"])
+        ]
+        hits.sort(key=itemgetter(1))
+        activities = {name: activity for _, _, name, activity in hits}
+    else:
+        # Start from the day's activities when filtering by day
+        candidates = indexes.by_day.get(day, []) if day else indexes.all_activities
+        matches = _compile_filter(start_time, end_time)
+        activities = {
+            name: activity
+            for name, activity in candidates
+            if matches(activity["schedule_details"])
+        }
+
+    # Serialize once so cache hits skip FastAPI's response encoding
+    body = orjson.dumps(activities)
+    etag = f'"{xxhash.xxh3_64_hexdigest(body)}"'
+    return body, etag
+
+def _invalidate_cache() -> None:
+    """Drop cached listings and indexes so the next read reloads them"""
+    global _indexes, _indexes_token
+    with _indexes_lock:
+        _indexes_token = object()
+        _indexes = None
+    _compute_response_bytes.cache_clear()
+
+@router.get("/")
 def get_activities(
     day: Optional[str] = None,
     start_time: Optional[str] = None,
-    end_time: Optional[str] = None
-) -> Dict[str, Any]:
+    end_time: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
     """
     Get all activities with their details, with optional filtering by day and time
     
@@ -26,41 +157,20 @@ def get_activities(
     - start_time: Filter activities starting at or after this time (24-hour format, e.g., '14:30')
     - end_time: Filter activities ending at or before this time (24-hour format, e.g., '17:00')
     """
-    # Build the query based on provided filters
-    query = {}
-    
-    if day:
-        query["schedule_details.days"] = {"$in": [day]}
-    
-    if start_time:
-        query["schedule_details.start_time"] = {"$gte": start_time}
-    
-    if end_time:
-        query["schedule_details.end_time"] = {"$lte": end_time}
-    
-    # Query the database
-    activities = {}
-    for activity in activities_collection.find(query):
-        name = activity.pop('_id')
-        activities[name] = activity
-    
-    return activities
+    body, etag = _compute_response_bytes(_current_indexes(), day, start_time, end_time)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    # Clients that already hold this exact listing get an empty 304
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
 
-@router.get("/days", response_model=List[str])
-def get_available_days() -> List[str]:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/days")
+def get_available_days() -> Response:
     """Get a list of all days that have activities scheduled"""
-    # Aggregate to get unique days across all activities
-    pipeline = [
-        {"$unwind": "$schedule_details.days"},
-        {"$group": {"_id": "$schedule_details.days"}},
-        {"$sort": {"_id": 1}}  # Sort days alphabetically
-    ]
-    
-    days = []
-    for day_doc in activities_collection.aggregate(pipeline):
-        days.append(day_doc["_id"])
-    
-    return days
+    # The day index already holds every scheduled day
+    return Response(content=_current_indexes().days_body, media_type="application/json")
 
 @router.post("/{activity_name}/signup")
 def signup_for_activity(activity_name: str, email: str, teacher_username: Optional[str] = Query(None)):
@@ -69,29 +179,25 @@ def signup_for_activity(activity_name: str, email: str, teacher_username: Option
     if not teacher_username:
         raise HTTPException(status_code=401, detail="Authentication required for this action")
     
-    teacher = teachers_collection.find_one({"_id": teacher_username})
+    # Only existence matters, so fetch nothing but the _id
+    teacher = teachers_collection.find_one({"_id": teacher_username}, {"_id": 1})
     if not teacher:
         raise HTTPException(status_code=401, detail="Invalid teacher credentials")
     
-    # Get the activity
-    activity = activities_collection.find_one({"_id": activity_name})
-    if not activity:
-        raise HTTPException(status_code=404, detail="Activity not found")
-
-    # Validate student is not already signed up
-    if email in activity["participants"]:
-        raise HTTPException(
-            status_code=400, detail="Already signed up for this activity")
-
-    # Add student to participants
+    # Add student to participants; the filter only matches when the student
+    # is not signed up yet, so the duplicate check happens in the database
     result = activities_collection.update_one(
-        {"_id": activity_name},
+        {"_id": activity_name, "participants": {"$ne": email}},
         {"$push": {"participants": email}}
     )
 
     if result.modified_count == 0:
-        raise HTTPException(status_code=500, detail="Failed to update activity")
-    
+        if not activities_collection.find_one({"_id": activity_name}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Activity not found")
+        raise HTTPException(
+            status_code=400, detail="Already signed up for this activity")
+
+    _invalidate_cache()
     return {"message": f"Signed up {email} for {activity_name}"}
 
 @router.post("/{activity_name}/unregister")
@@ -101,27 +207,23 @@ def unregister_from_activity(activity_name: str, email: str, teacher_username: O
     if not teacher_username:
         raise HTTPException(status_code=401, detail="Authentication required for this action")
     
-    teacher = teachers_collection.find_one({"_id": teacher_username})
+    # Only existence matters, so fetch nothing but the _id
+    teacher = teachers_collection.find_one({"_id": teacher_username}, {"_id": 1})
     if not teacher:
         raise HTTPException(status_code=401, detail="Invalid teacher credentials")
     
-    # Get the activity
-    activity = activities_collection.find_one({"_id": activity_name})
-    if not activity:
-        raise HTTPException(status_code=404, detail="Activity not found")
-
-    # Validate student is signed up
-    if email not in activity["participants"]:
-        raise HTTPException(
-            status_code=400, detail="Not registered for this activity")
-
-    # Remove student from participants
+    # Remove student from participants; the filter only matches when the
+    # student is registered, so the membership check happens in the database
     result = activities_collection.update_one(
-        {"_id": activity_name},
+        {"_id": activity_name, "participants": email},
         {"$pull": {"participants": email}}
     )
 
     if result.modified_count == 0:
-        raise HTTPException(status_code=500, detail="Failed to update activity")
-    
+        if not activities_collection.find_one({"_id": activity_name}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Activity not found")
+        raise HTTPException(
+            status_code=400, detail="Not registered for this activity")
+
+    _invalidate_cache()
     return {"message": f"Unregistered {email} from {activity_name}"}
\ No newline at end of file